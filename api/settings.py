@@ -94,7 +94,9 @@ DATABASES = {
         'HOST': os.environ.get("DB_HOST"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASSWORD"),
-        'PORT': os.environ.get("DB_PORT")
+        'PORT': os.environ.get("DB_PORT"),
+        'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
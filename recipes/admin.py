@@ -12,9 +12,6 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = [
         'title', 'slug',
     ]
-    list_filter = [
-        'title', 'slug'
-    ]
     search_fields = [
         'title', 'slug'
     ]
@@ -31,15 +28,15 @@ class RecipeAdmin(admin.ModelAdmin):
     ]
 
     list_filter = [
-        'category', 'published', 'author', 'title', 'slug'
+        'category', 'published', 'author'
     ]
     search_fields = [
         'title', 'instructions'
     ]
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).\
-            select_related('category', 'author')
+    raw_id_fields = ['author']
+    readonly_fields = ['average_rating', 'rating_count']
+    list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(Ingredient)
@@ -52,9 +49,9 @@ class IngredientAdmin(admin.ModelAdmin):
 
     search_fields = ['name']
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).\
-            select_related('recipe')
+    raw_id_fields = ['recipe']
+    list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(Review)
@@ -68,10 +65,9 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = [
         'content'
     ]
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).\
-            select_related('author', 'recipe')
+    raw_id_fields = ['recipe', 'author']
+    list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(Rating)
@@ -82,10 +78,9 @@ class RatingAdmin(admin.ModelAdmin):
     list_filter = [
         'recipe', 'author', 'published', 'value'
     ]
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).\
-            select_related('author', 'recipe')
+    raw_id_fields = ['recipe', 'author']
+    list_per_page = 50
+    show_full_result_count = False
 
 
 @admin.register(RecipeImage)
@@ -97,8 +92,9 @@ class RecipeImageAdmin(admin.ModelAdmin):
         'recipe'
     ]
     readonly_fields = ['image']
+    raw_id_fields = ['recipe']
 
     def image_tag(self, obj):
-        return format_html(f'<img src="{obj.image.url}" width="50" height="50">')
+        return format_html('<img src="{}" width="50" height="50">', obj.image_url)
 
     image_tag.short_description = 'Recipe image'
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-14 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['recipe', 'name'], name='recipes_ing_recipe__afad4c_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-14 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_add_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='published',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='title',
+            field=models.CharField(db_index=True, max_length=155),
+        ),
+    ]
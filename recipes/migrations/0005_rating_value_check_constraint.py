@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-14 18:58
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_title_published_db_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rating',
+            name='value',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.CheckConstraint(check=models.Q(('value__gte', 0), ('value__lte', 10)), name='rating_value_0_10'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.4 on 2026-10-14 19:00
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def fill_recipe_rating(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = Recipe.objects.annotate(
+        avg_value=Avg('ratings__value'), count=Count('ratings')
+    ).filter(count__gt=0)
+    for recipe in recipes:
+        Recipe.objects.filter(id=recipe.id).update(
+            average_rating=recipe.avg_value, rating_count=recipe.count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_rating_value_check_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='average_rating',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_recipe_rating, migrations.RunPython.noop),
+    ]
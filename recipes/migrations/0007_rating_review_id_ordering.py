@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-14 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_average_rating_rating_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='rating',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['recipe', '-id'], name='recipes_rat_recipe__e6fd1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['recipe', '-id'], name='recipes_rev_recipe__fa97e2_idx'),
+        ),
+    ]
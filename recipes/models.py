@@ -1,11 +1,42 @@
 from django.db import models
 from django.db.models import Avg
 from django.template.defaultfilters import slugify
-from django.core.validators import MinValueValidator
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils.functional import cached_property
 from users.models import CustomUser
 from recipes.validators import validate_file_size
 
 
+class SelectRelatedManager(models.Manager):
+    # Manager that always joins related_fields of subclass,
+    # so that they are not queried separately for each row.
+    # Related managers subclass default manager and already know
+    # object they belong to, so that one is not joined again
+    related_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        field = getattr(self, 'field', None)
+        related_fields = [name for name in self.related_fields
+                          if field is None or name != field.name]
+        # select_related() without arguments would join everything
+        if related_fields:
+            queryset = queryset.select_related(*related_fields)
+        return queryset
+
+
+class RecipeManager(SelectRelatedManager):
+    related_fields = ('author', 'category')
+
+
+class RecipeChildManager(SelectRelatedManager):
+    related_fields = ('recipe',)
+
+
+class RecipeAuthorChildManager(SelectRelatedManager):
+    related_fields = ('recipe', 'author')
+
+
 class Category(models.Model):
     title = models.CharField(max_length=155, unique=True)
     slug = models.SlugField(max_length=155, unique=True)
@@ -18,39 +49,81 @@ class Category(models.Model):
 
 
 class Rating(models.Model):
-    rating_choices = [(0, 0), (1, 1), (2, 2),
-                      (3, 3), (4, 4), (5, 5),
-                      (6, 6), (7, 7), (8, 8),
-                      (9, 9), (10, 10)]
     recipe = models.ForeignKey(
         'recipes.Recipe', related_name='ratings', on_delete=models.CASCADE)
     author = models.ForeignKey(
         CustomUser, related_name='ratings', on_delete=models.CASCADE)
-    value = models.PositiveSmallIntegerField(choices=rating_choices)
+    value = models.PositiveSmallIntegerField(
+        validators=[MaxValueValidator(10)])
     published = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = RecipeAuthorChildManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recipe that rating was counted in when loaded, so that
+        # signals can refresh it too if rating is moved to other recipe
+        instance._loaded_recipe_id = instance.__dict__.get('recipe_id')
+        return instance
+
     class Meta:
-        ordering = ['-published']
+        # published grows together with id, so ordering by id is the same.
+        # (recipe, -id) serves listings of recipe without a sort,
+        # author's listings use author foreign key index
+        ordering = ['-id']
         unique_together = ('recipe', 'author')
+        indexes = [
+            models.Index(fields=['recipe', '-id']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(value__gte=0) & models.Q(value__lte=10),
+                name='rating_value_0_10'),
+        ]
 
 
 class Recipe(models.Model):
     author = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name='recipes')
-    title = models.CharField(max_length=155, unique=False)
+    title = models.CharField(max_length=155, unique=False, db_index=True)
     instructions = models.TextField()
     slug = models.SlugField(max_length=155, unique=False, blank=True)
     category = models.ForeignKey(Category,
                                  on_delete=models.PROTECT, related_name='recipes')
     # null=True on published has no functionality
     # it was necessary because of some issues while running migration
-    published = models.DateTimeField(auto_now_add=True, null=True)
+    published = models.DateTimeField(
+        auto_now_add=True, null=True, db_index=True)
     updated = models.DateTimeField(auto_now=True)
-
-    def save(self, *args, **kwargs):
-        self.slug = slugify(self.title)
-        super(Recipe, self).save(*args, **kwargs)
+    # Both are kept up to date by signals on Rating,
+    # so that they are not aggregated on every request
+    average_rating = models.FloatField(null=True, blank=True)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    objects = RecipeManager()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # slug only depends on title, so it is not rebuilt
+        # on partial saves that do not touch title
+        if update_fields is None or 'title' in update_fields:
+            self.slug = slugify(self.title)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'slug'}
+        # Rating fields are only written by signals on Rating,
+        # saving instance loaded earlier must not overwrite them.
+        # Deferred fields are left out, as Django itself does
+        if update_fields is None and self.pk is not None \
+                and not self._state.adding and not kwargs.get('force_insert'):
+            deferred_fields = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred_fields
+                and field.name not in ('average_rating', 'rating_count')
+            ]
+        super(Recipe, self).save(*args, update_fields=update_fields, **kwargs)
 
     def __str__(self):
         return self.title
@@ -84,16 +157,24 @@ class Ingredient(models.Model):
     recipe = models.ForeignKey(
         Recipe, related_name='ingredients', on_delete=models.CASCADE)
 
+    objects = RecipeChildManager()
+
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['recipe', 'name']),
+        ]
 
-    def save(self, *args, **kwargs):
-        self.slug = slugify(self.name)
-        self.name = self.name.lower()
-        super(Ingredient, self).save(*args, **kwargs)
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'name' in update_fields:
+            self.slug = slugify(self.name)
+            self.name = self.name.lower()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'slug'}
+        super(Ingredient, self).save(*args, update_fields=update_fields, **kwargs)
 
 
 class RecipeImage(models.Model):
@@ -102,6 +183,14 @@ class RecipeImage(models.Model):
     image = models.ImageField(
         upload_to='recipes/images/', validators=[validate_file_size])
 
+    objects = RecipeChildManager()
+
+    @cached_property
+    def image_url(self):
+        # Building url of stored image is not free,
+        # so it is done at most once per instance
+        return self.image.url
+
     class Meta:
         ordering = ['id']
 
@@ -115,6 +204,12 @@ class Review(models.Model):
     published = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = RecipeAuthorChildManager()
+
     class Meta:
-        ordering = ['-published']
+        # Same as Rating
+        ordering = ['-id']
         unique_together = ('recipe', 'author')
+        indexes = [
+            models.Index(fields=['recipe', '-id']),
+        ]
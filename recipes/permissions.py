@@ -1,6 +1,5 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from rest_framework.exceptions import NotFound
-from recipes.models import Recipe, Ingredient
+from recipes.models import Ingredient
 
 
 class IsAdminOrReadOnly(BasePermission):
@@ -21,11 +20,8 @@ class IsAuthorOrReadOnly(BasePermission):
 class NestedIsAuthenticatedOrReadOnly(BasePermission):
 
     def has_permission(self, request, view):
-        recipe_id = view.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_id).first()
-        if not recipe:
-            raise NotFound(
-                detail=f"Recipe with id {recipe_id} was not found.")
+        # Existence of recipe referenced in url is checked by view,
+        # before permissions for write requests
         if request.method in SAFE_METHODS:
             return True
         else:
@@ -35,13 +31,9 @@ class NestedIsAuthenticatedOrReadOnly(BasePermission):
 class NestedIsAuthorOrReadOnly(BasePermission):
 
     def has_object_permission(self, request, view, obj):
-        recipe_id = view.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_id).first()
-        if not recipe:
-            raise NotFound(detail=f"Recipe with id {recipe_id} was not found.")
         if request.method in SAFE_METHODS:
             return True
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 
 class IsRecipeAuthorOrReadOnly(BasePermission):
@@ -49,24 +41,15 @@ class IsRecipeAuthorOrReadOnly(BasePermission):
     # can create, update or delete objects that reference that recipe
     def has_permission(self, request, view):
         # If recipe that is referenced in url does not exist,
-        # then it does not matter if user is authenticated or not
-        recipe_id = view.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_id).first()
-        if not recipe:
-            raise NotFound(
-                detail=f"Recipe with id {recipe_id} was not found.")
+        # then it does not matter if user is authenticated or not,
+        # view raises NotFound
         if request.method in SAFE_METHODS:
             return True
-        return recipe.author == request.user
+        return view.get_recipe_author_id() == request.user.id
 
     def has_object_permission(self, request, view, obj: Ingredient):
-        # If recipe that is referenced in url does not exist,
-        # then it does not matter if user is authenticated or not
-        recipe_id = view.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_id).first()
-        if not recipe:
-            raise NotFound(
-                detail=f"Recipe with id {recipe_id} was not found.")
+        # obj was already fetched through recipe referenced in url,
+        # so that recipe does not need to be looked up again
         if request.method in SAFE_METHODS:
             return True
-        return obj.recipe.author == request.user
+        return obj.recipe.author_id == request.user.id
@@ -0,0 +1,63 @@
+from functools import lru_cache
+from django.urls import get_script_prefix, reverse as django_reverse
+from rest_framework import serializers
+from rest_framework.reverse import preserve_builtin_query_params, reverse
+from rest_framework_nested.relations import NestedHyperlinkedIdentityField
+
+
+@lru_cache
+def url_template(view_name, format, names, script_prefix):
+    # Relative url does not depend on request, so it is reversed
+    # once per process, script_prefix is only part of cache key.
+    # Cache is cleared when ROOT_URLCONF changes, see recipes.signals
+    kwargs = {name: f'__{name}__' for name in names}
+    if format is not None:
+        kwargs['format'] = format
+    return django_reverse(view_name, kwargs=kwargs)
+
+
+class CachedReverseMixin:
+    # Absolute URL template for view_name, with placeholders
+    # in place of lookup values, is built only once per request,
+    # every object just fills it in
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # HyperlinkedRelatedField assigns reverse to instance,
+        # which would hide method with the same name on class
+        self.reverse = self.cached_reverse
+
+    def cached_reverse(self, view_name, kwargs=None, request=None, format=None):
+        kwargs = kwargs or {}
+        if request is None:
+            return reverse(view_name, kwargs=kwargs, format=format)
+        templates = getattr(request, '_cached_url_templates', None)
+        if templates is None:
+            templates = {}
+            request._cached_url_templates = templates
+        key = (view_name, format, tuple(sorted(kwargs)))
+        template = templates.get(key)
+        if template is None:
+            path = url_template(*key, get_script_prefix())
+            # Same as rest_framework.reverse.reverse without versioning
+            template = preserve_builtin_query_params(
+                request.build_absolute_uri(path), request)
+            templates[key] = template
+        url = template
+        for name, value in kwargs.items():
+            url = url.replace(f'__{name}__', str(value), 1)
+        return url
+
+
+class CachedHyperlinkedRelatedField(CachedReverseMixin,
+                                    serializers.HyperlinkedRelatedField):
+    pass
+
+
+class CachedHyperlinkedIdentityField(CachedReverseMixin,
+                                     serializers.HyperlinkedIdentityField):
+    pass
+
+
+class CachedNestedHyperlinkedIdentityField(CachedReverseMixin,
+                                           NestedHyperlinkedIdentityField):
+    pass
@@ -1,13 +1,16 @@
 from django.db.models import Avg
 from rest_framework import serializers
-from rest_framework_nested.relations import NestedHyperlinkedIdentityField, NestedHyperlinkedRelatedField
+from rest_framework_nested.relations import NestedHyperlinkedRelatedField
 from rest_framework_nested.serializers import NestedHyperlinkedModelSerializer
 from recipes.models import Category, Recipe, Ingredient, RecipeImage, Review, Rating
+from recipes.relations import CachedHyperlinkedRelatedField, CachedHyperlinkedIdentityField, \
+    CachedNestedHyperlinkedIdentityField
 from users.models import CustomUser
 
 
 class CategorySerializer(serializers.HyperlinkedModelSerializer):
-    get_recipes = serializers.HyperlinkedIdentityField(
+    serializer_url_field = CachedHyperlinkedIdentityField
+    get_recipes = CachedHyperlinkedIdentityField(
         view_name='category-get-recipes', read_only=True
     )
 
@@ -17,29 +20,29 @@ class CategorySerializer(serializers.HyperlinkedModelSerializer):
 
 
 class RecipeSerializer(serializers.HyperlinkedModelSerializer):
+    serializer_url_field = CachedHyperlinkedIdentityField
     author_name = serializers.ReadOnlyField(source='author.username')
-    author = serializers.HyperlinkedRelatedField(view_name='author-detail',
-                                                 read_only=True)
+    author = CachedHyperlinkedRelatedField(view_name='author-detail',
+                                           read_only=True)
     category_title = serializers.ReadOnlyField(source='category.title')
-    category = serializers.HyperlinkedRelatedField(view_name='category-detail',
-                                                   read_only=True)
-    get_ingredients = serializers.HyperlinkedIdentityField(
+    category = CachedHyperlinkedRelatedField(view_name='category-detail',
+                                             read_only=True)
+    get_ingredients = CachedHyperlinkedIdentityField(
         view_name='recipe-get-ingredients', read_only=True
     )
 
-    get_reviews = serializers.HyperlinkedIdentityField(
+    get_reviews = CachedHyperlinkedIdentityField(
         view_name='recipe-get-reviews', read_only=True
     )
 
-    get_ratings = serializers.HyperlinkedIdentityField(
+    get_ratings = CachedHyperlinkedIdentityField(
         view_name='recipe-get-ratings', read_only=True
     )
 
-    get_average_rating = serializers.HyperlinkedIdentityField(
-        view_name='recipe-get-average-rating', read_only=True
-    )
+    average_rating = serializers.FloatField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
 
-    get_images = serializers.HyperlinkedIdentityField(
+    get_images = CachedHyperlinkedIdentityField(
         view_name='recipe-get-images', read_only=True
     )
 
@@ -50,11 +53,12 @@ class RecipeSerializer(serializers.HyperlinkedModelSerializer):
                   'author_name', 'author',
                   'category_title', 'category',
                   'get_ingredients', 'get_reviews',
-                  'get_ratings', 'get_average_rating',
+                  'get_ratings', 'average_rating', 'rating_count',
                   'get_images']
 
 
 class CreateUpdateRecipeSerializer(serializers.HyperlinkedModelSerializer):
+    serializer_url_field = CachedHyperlinkedIdentityField
     category_title = serializers.ReadOnlyField(source='category.title')
 
     class Meta:
@@ -64,7 +68,7 @@ class CreateUpdateRecipeSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class IngredientSerializer(NestedHyperlinkedModelSerializer):
-    url = NestedHyperlinkedIdentityField(
+    url = CachedNestedHyperlinkedIdentityField(
         view_name='recipe-ingredient-detail',
         lookup_field='pk',
         parent_lookup_kwargs={
@@ -72,7 +76,7 @@ class IngredientSerializer(NestedHyperlinkedModelSerializer):
         }
     )
     recipe_title = serializers.ReadOnlyField(source='recipe.title')
-    recipe = serializers.HyperlinkedRelatedField(
+    recipe = CachedHyperlinkedRelatedField(
         view_name='recipe-detail', read_only=True)
 
     class Meta:
@@ -83,19 +87,12 @@ class IngredientSerializer(NestedHyperlinkedModelSerializer):
             'recipe', 'ingredient_with_quantity'
         ]
 
-    ingredient_with_quantity = serializers.SerializerMethodField(
-        method_name='ingredient_repr'
-    )
-
-    def ingredient_repr(self, ingredient: Ingredient):
-        if ingredient.units_of_measurement:
-            return f'{ingredient.quantity} {ingredient.units_of_measurement} of {ingredient.name}'
-        else:
-            return f'{ingredient.quantity} {ingredient.name}'
+    # Built by database, see INGREDIENT_WITH_QUANTITY in recipes.views
+    ingredient_with_quantity = serializers.CharField(read_only=True)
 
 
 class CreateUpdateIngredientSerializer(NestedHyperlinkedModelSerializer):
-    url = NestedHyperlinkedIdentityField(
+    url = CachedNestedHyperlinkedIdentityField(
         view_name='recipe-ingredient-detail',
         lookup_field='pk',
         parent_lookup_kwargs={
@@ -104,7 +101,7 @@ class CreateUpdateIngredientSerializer(NestedHyperlinkedModelSerializer):
     )
 
     recipe_title = serializers.ReadOnlyField(source='recipe.title')
-    recipe = serializers.HyperlinkedRelatedField(
+    recipe = CachedHyperlinkedRelatedField(
         view_name='recipe-detail', read_only=True)
 
     class Meta:
@@ -116,7 +113,7 @@ class CreateUpdateIngredientSerializer(NestedHyperlinkedModelSerializer):
 
 
 class RecipeImageSerializer(NestedHyperlinkedModelSerializer):
-    url = NestedHyperlinkedIdentityField(
+    url = CachedNestedHyperlinkedIdentityField(
         view_name='recipe-image-detail',
         lookup_field='pk',
         parent_lookup_kwargs={
@@ -125,7 +122,7 @@ class RecipeImageSerializer(NestedHyperlinkedModelSerializer):
     )
 
     recipe_title = serializers.ReadOnlyField(source='recipe.title')
-    recipe = serializers.HyperlinkedRelatedField(
+    recipe = CachedHyperlinkedRelatedField(
         view_name='recipe-detail', read_only=True
     )
 
@@ -137,7 +134,7 @@ class RecipeImageSerializer(NestedHyperlinkedModelSerializer):
 
 
 class ReviewSerializer(NestedHyperlinkedModelSerializer):
-    url = NestedHyperlinkedIdentityField(
+    url = CachedNestedHyperlinkedIdentityField(
         view_name='recipe-review-detail',
         lookup_field='pk',
         parent_lookup_kwargs={
@@ -146,11 +143,11 @@ class ReviewSerializer(NestedHyperlinkedModelSerializer):
     )
 
     recipe_title = serializers.ReadOnlyField(source='recipe.title')
-    recipe = serializers.HyperlinkedRelatedField(
+    recipe = CachedHyperlinkedRelatedField(
         view_name='recipe-detail', read_only=True
     )
     author_name = serializers.ReadOnlyField(source='author.username')
-    author = serializers.HyperlinkedRelatedField(
+    author = CachedHyperlinkedRelatedField(
         view_name='author-detail', read_only=True
     )
 
@@ -163,7 +160,7 @@ class ReviewSerializer(NestedHyperlinkedModelSerializer):
 
 
 class RatingSerializer(NestedHyperlinkedModelSerializer):
-    url = NestedHyperlinkedIdentityField(
+    url = CachedNestedHyperlinkedIdentityField(
         view_name='recipe-rating-detail',
         lookup_field='pk',
         parent_lookup_kwargs={
@@ -172,11 +169,11 @@ class RatingSerializer(NestedHyperlinkedModelSerializer):
     )
 
     recipe_title = serializers.ReadOnlyField(source='recipe.title')
-    recipe = serializers.HyperlinkedRelatedField(
+    recipe = CachedHyperlinkedRelatedField(
         view_name='recipe-detail', read_only=True
     )
     author_name = serializers.ReadOnlyField(source='author.username')
-    author = serializers.HyperlinkedRelatedField(
+    author = CachedHyperlinkedRelatedField(
         view_name='author-detail', read_only=True
     )
 
@@ -189,10 +186,10 @@ class RatingSerializer(NestedHyperlinkedModelSerializer):
 
 
 class AuthorSerializer(serializers.ModelSerializer):
-    url = serializers.HyperlinkedIdentityField(
+    url = CachedHyperlinkedIdentityField(
         view_name='author-detail', read_only=True)
 
-    get_recipes = serializers.HyperlinkedIdentityField(
+    get_recipes = CachedHyperlinkedIdentityField(
         view_name='author-get-recipes', read_only=True
     )
 
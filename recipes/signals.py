@@ -0,0 +1,50 @@
+from django.db.models import Avg, Count
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from recipes.models import Recipe, Rating
+from recipes.relations import url_template
+
+
+def refresh_recipe_rating(recipe_id):
+    rating = Rating.objects.filter(recipe_id=recipe_id).\
+        aggregate(average_rating=Avg('value'), rating_count=Count('id'))
+    Recipe.objects.filter(id=recipe_id).update(**rating)
+
+
+@receiver(pre_delete, sender=Recipe)
+def mark_recipe_deleted(sender, instance: Recipe, origin=None, **kwargs):
+    # Ratings deleted by cascade together with their recipe
+    # need no update, deleted recipes are remembered on origin
+    # of delete(), which is the same for every signal it sends
+    if origin is None:
+        return
+    deleted_recipe_ids = getattr(origin, '_deleted_recipe_ids', None)
+    if deleted_recipe_ids is None:
+        deleted_recipe_ids = origin._deleted_recipe_ids = set()
+    deleted_recipe_ids.add(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Rating)
+def update_recipe_rating(sender, instance: Rating, origin=None, **kwargs):
+    if instance.recipe_id in getattr(origin, '_deleted_recipe_ids', ()):
+        return
+    # Recipe is updated only after rating is committed, so that
+    # transaction that inserts rating does not also wait for lock
+    # on recipe row, and aggregate sees every committed rating
+    recipe_id = instance.recipe_id
+    transaction.on_commit(lambda: refresh_recipe_rating(recipe_id))
+    # Rating moved to other recipe is no longer counted in recipe
+    # it was loaded with, the one on instance is what is now saved
+    loaded_recipe_id = getattr(instance, '_loaded_recipe_id', None)
+    if loaded_recipe_id is not None and loaded_recipe_id != recipe_id:
+        transaction.on_commit(
+            lambda: refresh_recipe_rating(loaded_recipe_id))
+    instance._loaded_recipe_id = recipe_id
+
+
+@receiver(setting_changed)
+def clear_url_templates(sender, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        url_template.cache_clear()
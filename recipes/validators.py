@@ -1,9 +1,11 @@
 from django.core.exceptions import ValidationError
 
 
-def validate_file_size(image):
+MAX_IMAGE_SIZE_MB = 5
+MAX_IMAGE_SIZE = MAX_IMAGE_SIZE_MB * 1024 * 1024
+
 
-    file_size = image.size
-    limit_mb = 5
-    if file_size > limit_mb * 1024 * 1024:
-        raise ValidationError(f"Maximum size of the image is {limit_mb} MB")
+def validate_file_size(image):
+    if image.size > MAX_IMAGE_SIZE:
+        raise ValidationError(
+            f"Maximum size of the image is {MAX_IMAGE_SIZE_MB} MB")
@@ -1,5 +1,7 @@
-from django.db.models import Avg
-from django.db.models.query_utils import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Prefetch, ProtectedError, Value, When
+from django.db.models.functions import Cast, Concat
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, mixins
 from rest_framework import filters
@@ -19,26 +21,121 @@ from recipes.exceptions import ConflictException
 from users.models import CustomUser
 
 
+class DecimalAsChar(Cast):
+    # MySQL and PostgreSQL keep decimal places of decimal column
+    # when it is cast to string, SQLite stores it as a number
+    # and drops them, so they are formatted explicitly there
+    def __init__(self, expression, decimal_places):
+        self.decimal_places = decimal_places
+        super().__init__(expression, CharField())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = f"printf('%%%%.{self.decimal_places}f', %(expressions)s)"
+        return self.as_sql(compiler, connection,
+                           template=template, **extra_context)
+
+
+QUANTITY = DecimalAsChar(
+    'quantity', Ingredient._meta.get_field('quantity').decimal_places)
+
+# String representation of ingredient with its quantity,
+# e.g. '1.00 gm of salt' or '2.00 egg'
+INGREDIENT_WITH_QUANTITY = Case(
+    When(units_of_measurement__isnull=False,
+         then=Concat(QUANTITY, Value(' '),
+                     'units_of_measurement', Value(' of '), 'name',
+                     output_field=CharField())),
+    default=Concat(QUANTITY, Value(' '), 'name',
+                   output_field=CharField()),
+    output_field=CharField()
+)
+
+# Columns RecipeSerializer reads, recipes are listed
+# without the rest of author's and category's rows
+RECIPE_FIELDS = (
+    'id', 'title', 'slug', 'instructions', 'published', 'updated',
+    'average_rating', 'rating_count', 'author__id', 'author__username',
+    'category__id', 'category__title'
+)
+
+
+class NestedRecipeViewMixin:
+    # Recipe referenced in url is checked at most once per request.
+    # Only author_id is selected, no Recipe instance is built.
+    # Requests other than GET and HEAD check it before permissions,
+    # so that they can use its author without querying it again.
+    # GET and HEAD only check it when nothing was found for it,
+    # to tell missing recipe apart from recipe with no related objects
+    recipe_author_id = None
+
+    def check_recipe(self):
+        recipe_pk = self.kwargs['recipe_pk']
+        self.recipe_author_id = None
+        if recipe_pk.isdecimal():
+            self.recipe_author_id = Recipe.objects.filter(id=recipe_pk).\
+                values_list('author_id', flat=True).first()
+        if self.recipe_author_id is None:
+            raise NotFound(
+                detail=f"Recipe with id {recipe_pk} was not found.")
+
+    def get_recipe_author_id(self):
+        if self.recipe_author_id is None:
+            self.check_recipe()
+        return self.recipe_author_id
+
+    def check_permissions(self, request):
+        # Called after content negotiation, so that NotFound is rendered
+        # as requested, and before permissions, so that missing recipe
+        # is 404 and not 401. Id that is not a number cannot be
+        # filtered by at all
+        if request.method not in ('GET', 'HEAD') or \
+                not self.kwargs['recipe_pk'].isdecimal():
+            self.get_recipe_author_id()
+        super().check_permissions(request)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page and self.request.method in SAFE_METHODS:
+            self.check_recipe()
+        return page
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method in SAFE_METHODS:
+                self.check_recipe()
+            raise
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    permission_classes = [IsAdminOrReadOnly]
+    permission_classes = (IsAdminOrReadOnly,)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'slug']
     ordering_fields = ['title', 'slug']
 
     def destroy(self, request, *args, **kwargs):
-        if Recipe.objects.filter(category_id=self.kwargs['pk']):
+        # Recipe.category is protected, deletion itself
+        # fails if category has recipes
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
             raise ConflictException(method='DELETE',
                                     detail='Category has recipes associated with it, cannot be deleted.')
-        return super().destroy(request, *args, **kwargs)
 
     @action(detail=True, methods=['GET', 'HEAD', 'OPTIONS'])
     def get_recipes(self, request, *args, **kwargs):
-        category = self.get_object()
-        recipes = Recipe.objects.\
-            select_related('category', 'author').\
-            filter(category=category).all()
+        # Recipes are filtered by id from url, category itself
+        # is looked up only to tell missing category apart
+        # from category with no recipes, or if id is not a number
+        if not kwargs['pk'].isdecimal():
+            self.get_object()
+        recipes = Recipe.objects.filter(category_id=kwargs['pk']).\
+            only(*RECIPE_FIELDS).all()
+        if not recipes:
+            self.get_object()
         if request.method == 'GET':
             serializer = RecipeSerializer(
                 recipes, many=True, context={'request': request})
@@ -46,13 +143,42 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.select_related('author', 'category').all()
-    permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    queryset = Recipe.objects.all()
+    permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'slug', 'instructions',
                      'category__title', 'author__username']
     ordering_fields = ['title', 'slug', 'category__title', 'author__username']
 
+    def get_queryset(self):
+        # Related objects listed by action are loaded
+        # together with recipe itself
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.only(*RECIPE_FIELDS)
+        # Prefetched objects get recipe from prefetch itself,
+        # so recipe joined by their managers is dropped
+        if self.action == 'get_ingredients':
+            return queryset.prefetch_related(Prefetch(
+                'ingredients', queryset=Ingredient.objects.select_related(None).
+                annotate(ingredient_with_quantity=INGREDIENT_WITH_QUANTITY)
+            ))
+        if self.action == 'get_reviews':
+            return queryset.prefetch_related(Prefetch(
+                'reviews', queryset=Review.objects.select_related(None).
+                select_related('author')
+            ))
+        if self.action == 'get_ratings':
+            return queryset.prefetch_related(Prefetch(
+                'ratings', queryset=Rating.objects.select_related(None).
+                select_related('author')
+            ))
+        if self.action == 'get_images':
+            return queryset.prefetch_related(Prefetch(
+                'images', queryset=RecipeImage.objects.select_related(None)
+            ))
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(author_id=self.request.user.id)
 
@@ -65,9 +191,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['GET', 'HEAD', 'OPTIONS'])
     def get_ingredients(self, request, *args, **kwargs):
         recipe = self.get_object()
-        ingredients = Ingredient.objects.\
-            select_related('recipe').filter(
-                recipe=recipe).all()
+        ingredients = recipe.ingredients.all()
         if request.method == 'GET':
             serializer = IngredientSerializer(ingredients,
                                               many=True,
@@ -77,10 +201,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True,  methods=['GET', 'HEAD', 'OPTIONS'])
     def get_reviews(self, request, *args, **kwargs):
         recipe = self.get_object()
-        reviews = Review.objects.\
-            select_related('recipe', 'author').filter(
-                recipe=recipe
-            ).all()
+        reviews = recipe.reviews.all()
         if request.method == 'GET':
             serializer = ReviewSerializer(
                 reviews, many=True,
@@ -91,8 +212,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['GET', 'HEAD', 'OPTIONS'])
     def get_ratings(self, request, *args, **kwargs):
         recipe = self.get_object()
-        ratings = Rating.objects.\
-            filter(recipe=recipe).select_related('author', 'recipe').all()
+        ratings = recipe.ratings.all()
         if request.method == 'GET':
             serializer = RatingSerializer(
                 ratings, many=True,
@@ -102,18 +222,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(detail=True,  methods=['GET', 'HEAD', 'OPTIONS'])
     def get_average_rating(self, request, *args, **kwargs):
+        # average_rating is kept on recipe by signals on Rating
         recipe = self.get_object()
         if request.method == 'GET':
-            average_rating = Rating.objects.\
-                filter(recipe=recipe).aggregate(avg_rating=Avg('value'))
-            return Response(average_rating)
+            return Response({'avg_rating': recipe.average_rating})
 
     @action(detail=True,  methods=['GET', 'HEAD', 'OPTIONS'])
     def get_images(self, request, *args, **kwargs):
         recipe = self.get_object()
-        images = RecipeImage.objects.\
-            select_related('recipe').\
-            filter(recipe=recipe).all()
+        images = recipe.images.all()
         if request.method == 'GET':
             serializer = RecipeImageSerializer(
                 images, many=True,
@@ -122,8 +239,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
-    permission_classes = [IsRecipeAuthorOrReadOnly]
+class IngredientViewSet(NestedRecipeViewMixin, viewsets.ModelViewSet):
+    permission_classes = (IsRecipeAuthorOrReadOnly,)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name, slug']
     ordering_fields = ['name', 'slug']
@@ -136,44 +253,42 @@ class IngredientViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return Ingredient.objects.\
-            select_related('recipe', 'recipe__author').\
+            annotate(ingredient_with_quantity=INGREDIENT_WITH_QUANTITY).\
             filter(recipe__id=self.kwargs['recipe_pk']).all()
 
     def perform_create(self, serializer):
         ingredient_name = str(self.request.data['name']).lower()
-        ingredient = Ingredient.objects.filter(
-            Q(name=ingredient_name) &
-            Q(recipe__id=self.kwargs['recipe_pk'])
-        ).first()
-        if ingredient:
+        if Ingredient.objects.filter(
+            name=ingredient_name,
+            recipe_id=self.kwargs['recipe_pk']
+        ).exists():
             raise ValidationError(
                 detail=f"Ingredient with name '{ingredient_name}' already exists for this recipe.")
         serializer.save(recipe_id=self.kwargs['recipe_pk'])
 
     def perform_update(self, serializer):
-        ingredient = self.get_object()
+        ingredient = serializer.instance
         ingredient_name = str(self.request.data['name']).lower()
-        ingredient_with_name = Ingredient.objects.filter(
-            Q(recipe__id=self.kwargs['recipe_pk']) &
-            Q(name=ingredient_name)
-        ).first()
-        if ingredient_with_name and (ingredient_with_name != ingredient):
+        if Ingredient.objects.filter(
+            recipe_id=self.kwargs['recipe_pk'],
+            name=ingredient_name
+        ).exclude(id=ingredient.id).exists():
             raise ValidationError(detail=f"Ingredient with name '{ingredient_name}' already exists\
                                     for this recipe.")
         return super().perform_update(serializer)
 
 
-class RecipeImageViewSet(mixins.ListModelMixin,
+class RecipeImageViewSet(NestedRecipeViewMixin,
+                         mixins.ListModelMixin,
                          mixins.RetrieveModelMixin,
                          mixins.CreateModelMixin,
                          mixins.DestroyModelMixin,
                          viewsets.GenericViewSet):
     serializer_class = RecipeImageSerializer
-    permission_classes = [IsRecipeAuthorOrReadOnly]
+    permission_classes = (IsRecipeAuthorOrReadOnly,)
 
     def get_queryset(self):
         return RecipeImage.objects.\
-            select_related('recipe', 'recipe__author').\
             filter(recipe__id=self.kwargs['recipe_pk']).all()
 
     def perform_create(self, serializer):
@@ -190,69 +305,66 @@ class RecipeImageViewSet(mixins.ListModelMixin,
             serializer.save(recipe_id=self.kwargs['recipe_pk'])
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(NestedRecipeViewMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    permission_classes = [
-        NestedIsAuthenticatedOrReadOnly, NestedIsAuthorOrReadOnly]
+    permission_classes = (
+        NestedIsAuthenticatedOrReadOnly, NestedIsAuthorOrReadOnly)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['author__username', 'content']
     ordering_fields = ['author__username', 'content', 'published']
 
     def get_queryset(self):
-        recipe_pk = self.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_pk).first()
-        return Review.objects.select_related('recipe', 'author').\
-            filter(recipe=recipe).all()
+        return Review.objects.\
+            filter(recipe_id=self.kwargs['recipe_pk']).all()
 
     def perform_create(self, serializer):
         recipe_pk = self.kwargs['recipe_pk']
         user_pk = self.request.user.id
-        review = Review.objects.filter(
-            Q(author__id=user_pk) &
-            Q(recipe__id=recipe_pk)
-        ).first()
-        if review:
+        # (recipe, author) is unique in database,
+        # second review of the same user fails on insert
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    recipe_id=recipe_pk,
+                    author_id=user_pk
+                )
+        except IntegrityError:
             raise ConflictException(
                 method='POST',
                 detail='User can only have one review for each recipe.'
             )
-        serializer.save(
-            recipe_id=recipe_pk,
-            author_id=user_pk
-        )
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class RatingViewSet(NestedRecipeViewMixin, viewsets.ModelViewSet):
     serializer_class = RatingSerializer
-    permission_classes = [
-        NestedIsAuthenticatedOrReadOnly, NestedIsAuthorOrReadOnly]
+    permission_classes = (
+        NestedIsAuthenticatedOrReadOnly, NestedIsAuthorOrReadOnly)
 
     def get_queryset(self):
-        recipe_pk = self.kwargs['recipe_pk']
-        recipe = Recipe.objects.filter(id=recipe_pk).first()
-        return Rating.objects.select_related('recipe', 'author').\
-            filter(recipe=recipe).all()
+        return Rating.objects.\
+            filter(recipe_id=self.kwargs['recipe_pk']).all()
 
     def perform_create(self, serializer):
         recipe_pk = self.kwargs['recipe_pk']
         user_pk = self.request.user.id
-        rating = Rating.objects.filter(
-            Q(author__id=user_pk) &
-            Q(recipe__id=recipe_pk)
-        ).first()
-        if rating:
+        # (recipe, author) is unique in database,
+        # second rating of the same user fails on insert
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    recipe_id=recipe_pk,
+                    author_id=user_pk
+                )
+        except IntegrityError:
             raise ConflictException(
                 method='POST',
                 detail='User can only have one rating for each recipe.'
             )
-        serializer.save(
-            recipe_id=recipe_pk,
-            author_id=user_pk
-        )
 
 
 class AuthorViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = CustomUser.objects.filter(is_superuser=False).all()
+    queryset = CustomUser.objects.filter(is_superuser=False).\
+        only('id', 'username', 'image').all()
     serializer_class = AuthorSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     searching_fields = ['username']
@@ -260,9 +372,15 @@ class AuthorViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=True, methods=['GET', 'OPTIONS', 'HEAD'])
     def get_recipes(self, request, *args, **kwargs):
-        author = self.get_object()
-        recipes = Recipe.objects.select_related('category', 'author').\
-            filter(author=author).all()
+        # Same as in CategoryViewSet, superusers are not listed
+        # as authors, so their recipes are not listed either
+        if not kwargs['pk'].isdecimal():
+            self.get_object()
+        recipes = Recipe.objects.\
+            filter(author_id=kwargs['pk'], author__is_superuser=False).\
+            only(*RECIPE_FIELDS).all()
+        if not recipes:
+            self.get_object()
         if request.method == 'GET':
             serializer = RecipeSerializer(recipes, many=True,
                                           context={'request': request})
@@ -13,8 +13,20 @@ class CustomUserAdmin(admin.ModelAdmin):
     search_fields = ['username']
     readonly_fields = ['image_tag']
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Change form needs every field, only the changelist is trimmed
+        changelist = f'{self.opts.app_label}_{self.opts.model_name}_changelist'
+        if request.resolver_match and \
+                request.resolver_match.url_name == changelist:
+            queryset = queryset.only(
+                'id', 'username', 'email', 'date_joined',
+                'is_superuser', 'is_active', 'is_staff', 'image'
+            )
+        return queryset
+
+    @admin.display(description="User's image")
     def image_tag(self, obj):
-        if obj.is_superuser:
+        if obj.is_superuser or not obj.image:
             return None
-        return format_html(f'<img src="{obj.image.url}" width="100" height="100">')
-    image_tag.short_description = "User's image"
+        return format_html('<img src="{}" width="100" height="100">', obj.image.url)
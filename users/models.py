@@ -1,14 +1,7 @@
 from django.db import models
-from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser
-
-
-def validate_file_size(image):
-
-    file_size = image.size
-    limit_mb = 5
-    if file_size > limit_mb * 1024 * 1024:
-        raise ValidationError(f"Maximum size of the image is {limit_mb} MB")
+# users.models.validate_file_size is still referenced by migrations
+from recipes.validators import validate_file_size
 
 
 class CustomUser(AbstractUser):